@@ -0,0 +1,72 @@
+import asyncio
+from typing import Any, Callable, List, Set, Tuple
+
+# Número máximo de itens processados por lote
+MAX_LOTE = 64
+
+
+class AgrupadorAssincrono:
+    """
+    Agrupa chamadas concorrentes de `executar` em lotes processados por uma
+    única chamada `asyncio.to_thread`, amortizando o custo de despacho quando
+    várias requisições testam o mesmo autômato ao mesmo tempo.
+
+    Se nenhum lote está em execução, a chamada é despachada imediatamente,
+    sem espera. Enquanto um lote roda na thread, novas chamadas são acumuladas
+    e despachadas juntas (até `max_lote` por vez) assim que ele termina.
+    Exceções levantadas por `funcao` afetam apenas a chamada do item
+    correspondente.
+
+    Os itens de um lote são processados em sequência: um item lento (por
+    exemplo, uma Máquina de Turing que executa por muito tempo) atrasa os
+    demais itens do mesmo lote e os lotes seguintes do mesmo autômato.
+    """
+
+    def __init__(self, funcao: Callable[[Any], Any], max_lote: int = MAX_LOTE):
+        self.funcao = funcao
+        self.max_lote = max_lote
+        self._pendentes: List[Tuple[Any, asyncio.Future]] = []
+        self._em_execucao = False
+        self._tarefas: Set[asyncio.Task] = set()
+
+    async def executar(self, item: Any) -> Any:
+        futuro = asyncio.get_running_loop().create_future()
+        self._pendentes.append((item, futuro))
+        if not self._em_execucao:
+            self._despachar()
+        return await futuro
+
+    def _despachar(self):
+        lote = self._pendentes[:self.max_lote]
+        self._pendentes = self._pendentes[self.max_lote:]
+        if lote:
+            self._em_execucao = True
+            tarefa = asyncio.ensure_future(self._executar_lote(lote))
+            self._tarefas.add(tarefa)
+            tarefa.add_done_callback(self._tarefas.discard)
+
+    async def _executar_lote(self, lote: List[Tuple[Any, asyncio.Future]]):
+        try:
+            resultados = await asyncio.to_thread(self._processar, [item for item, _ in lote])
+        except Exception as erro:
+            resultados = [(False, erro)] * len(lote)
+
+        for (_, futuro), (sucesso, valor) in zip(lote, resultados):
+            if futuro.done():
+                continue
+            if sucesso:
+                futuro.set_result(valor)
+            else:
+                futuro.set_exception(valor)
+
+        self._em_execucao = False
+        self._despachar()
+
+    def _processar(self, itens: List[Any]) -> List[Tuple[bool, Any]]:
+        resultados = []
+        for item in itens:
+            try:
+                resultados.append((True, self.funcao(item)))
+            except Exception as erro:
+                resultados.append((False, erro))
+        return resultados
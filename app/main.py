@@ -1,10 +1,35 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from app.routes import aut_fin_det, aut_com_pilha, maq_turing
 
-app = FastAPI(title="AutomataAPI_TC_GabrielJardim", version="1.0.0")
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles que adiciona o cabeçalho Cache-Control às respostas. Páginas HTML
+    são sempre revalidadas (ETag/Last-Modified); os demais arquivos ficam em cache
+    por `max_age` segundos.
+    """
+
+    def __init__(self, *args, max_age: int = 31536000, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_age = max_age
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if str(full_path).endswith(".html"):
+            response.headers["Cache-Control"] = "no-cache"
+        else:
+            response.headers["Cache-Control"] = f"public, max-age={self.max_age}"
+        return response
+
+
+app = FastAPI(
+    title="AutomataAPI_TC_GabrielJardim",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,12 +40,12 @@ app.add_middleware(
 )
 
 # Servir arquivos estáticos (HTML, CSS, JS)
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+app.mount("/static", CachedStaticFiles(directory="app/static"), name="static")
 
-# Redirecionamento automático para a interface
+# Interface servida diretamente em "/", sem redirecionamento para /static/index.html
 @app.get("/", include_in_schema=False)
-async def redirect_to_index():
-    return RedirectResponse(url="/static/index.html")
+async def index():
+    return FileResponse("app/static/index.html", headers={"Cache-Control": "no-cache"})
 
 # Rotas da API
 app.include_router(aut_fin_det.router, prefix="/afd", tags=["Autômato Finito Determinístico"])
@@ -28,5 +53,21 @@ app.include_router(aut_com_pilha.router, prefix="/ap", tags=["Autômato Com Pilh
 app.include_router(maq_turing.router, prefix="/mt", tags=["Máquina de Turing"])
 
 if __name__ == "__main__":
+    import os
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
+
+    # "auto" usa uvloop e httptools quando instalados (requirements.txt), com fallback para asyncio/h11
+    if os.getenv("ENV") == "prod":
+        # Os autômatos ficam na memória de cada processo: com mais de um worker, um ID criado
+        # em um worker não é encontrado nos demais. Por isso o padrão é 1 (ajustável via WORKERS).
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=int(os.getenv("WORKERS", "1")),
+            loop="auto",
+            http="auto",
+            access_log=False,
+        )
+    else:
+        uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True, loop="auto", http="auto")
@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+# Número máximo de itens aceitos em uma requisição de teste em lote
+MAX_ITENS_LOTE = 1000
+
+class ItemTeste(BaseModel):
+    id: str
+    entrada: str
+
+class LoteTeste(BaseModel):
+    items: List[ItemTeste] = Field(max_length=MAX_ITENS_LOTE)
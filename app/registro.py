@@ -0,0 +1,116 @@
+import secrets
+from dataclasses import dataclass, field
+from functools import lru_cache
+from hashlib import blake2b
+from typing import Any, Callable, FrozenSet, List, Optional, Tuple
+
+import orjson
+from pydantic import BaseModel
+
+from .agrupador import AgrupadorAssincrono
+
+# Número máximo de entradas memorizadas por autômato
+TAMANHO_CACHE_ENTRADAS = 2048
+
+# Entradas mais longas que isto são simuladas sem passar pelo cache
+TAMANHO_MAX_ENTRADA_CACHE = 256
+
+# Número máximo de IDs mantidos em memória por tipo de autômato (os mais antigos são descartados)
+MAX_AUTOMATOS = 10_000
+
+ENTRADA_INVALIDA = "Entrada contém símbolos fora do alfabeto de entrada"
+
+
+@dataclass
+class RegistroAutomato:
+    """
+    Entrada dos dicionários em memória: guarda o autômato criado junto com
+    uma versão memorizada de `accepts_input`, de modo que testar a mesma
+    entrada várias vezes não simule o autômato novamente.
+
+    Apenas entradas com até `TAMANHO_MAX_ENTRADA_CACHE` caracteres são
+    memorizadas (ver `aceita`), para que o cache não retenha entradas longas.
+
+    Quando `simular` é informado (por exemplo, a tabela compilada de um AFD),
+    ele é usado no lugar de `accepts_input`.
+
+    Registros são compartilhados entre todos os IDs criados a partir da mesma
+    especificação (`chave`), assim como o código DOT gerado na criação (`dot`).
+    Requisições concorrentes de teste são agrupadas por `agrupador`.
+
+    `estados_ordenados` e `estados_finais` são calculados uma única vez e usados
+    na montagem do grafo da visualização.
+
+    `simbolos_ascii` guarda os símbolos de entrada de um caractere ASCII como
+    bytes, para validar entradas com `bytes.translate` (ver `entrada_valida`).
+    """
+    automato: Any
+    simular: Optional[Callable[[str], bool]] = None
+    chave: str = ""
+    dot: Optional[str] = None
+    accepts_cached: Callable[[str], bool] = field(init=False, repr=False)
+    agrupador: AgrupadorAssincrono = field(init=False, repr=False)
+    estados_ordenados: Tuple[str, ...] = field(init=False, repr=False)
+    estados_finais: FrozenSet[str] = field(init=False, repr=False)
+    alfabeto: FrozenSet[str] = field(init=False, repr=False)
+    simbolos_ascii: bytes = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.simular = self.simular or self.automato.accepts_input
+        self.accepts_cached = lru_cache(maxsize=TAMANHO_CACHE_ENTRADAS)(self.simular)
+        self.agrupador = AgrupadorAssincrono(self.aceita)
+        self.estados_ordenados = tuple(sorted(self.automato.states))
+        self.estados_finais = frozenset(self.automato.final_states)
+        self.alfabeto = frozenset(self.automato.input_symbols)
+        self.simbolos_ascii = bytes(
+            ord(simbolo) for simbolo in self.alfabeto if len(simbolo) == 1 and simbolo.isascii()
+        )
+
+    def aceita(self, entrada: str) -> bool:
+        """
+        Testa a entrada no autômato, usando o cache apenas para entradas com
+        até `TAMANHO_MAX_ENTRADA_CACHE` caracteres.
+        """
+        if len(entrada) > TAMANHO_MAX_ENTRADA_CACHE:
+            return self.simular(entrada)
+        return self.accepts_cached(entrada)
+
+    def entrada_valida(self, entrada: str) -> bool:
+        """
+        Retorna True se todos os caracteres da entrada pertencem ao alfabeto de
+        entrada. Para entradas ASCII, remove os símbolos válidos com
+        `bytes.translate` (implementado em C) e verifica se sobrou algo.
+        """
+        if entrada.isascii():
+            return not entrada.encode("ascii").translate(None, self.simbolos_ascii)
+        return self.alfabeto.issuperset(entrada)
+
+
+def novo_id() -> str:
+    """
+    Gera o ID de um autômato: 12 caracteres URL-safe (72 bits aleatórios),
+    mais curto que um UUID4 e igualmente imprevisível.
+    """
+    return secrets.token_urlsafe(9)
+
+
+def chave_especificacao(especificacao: BaseModel) -> str:
+    """
+    Gera uma chave canônica para a especificação de um autômato. Listas de
+    primeiro nível (estados, alfabetos, estados finais) são tratadas como
+    conjuntos, de modo que especificações equivalentes geram a mesma chave.
+    """
+    dados = {
+        campo: sorted(set(valor)) if isinstance(valor, list) else valor
+        for campo, valor in especificacao
+    }
+    serializado = orjson.dumps(dados, option=orjson.OPT_SORT_KEYS)
+    return blake2b(serializado, digest_size=16).hexdigest()
+
+
+def testar_lote(registros: List[RegistroAutomato], entradas: List[str]) -> List[bool]:
+    """
+    Testa cada entrada no autômato correspondente, na mesma ordem.
+    Executado em uma única chamada `asyncio.to_thread` pelos endpoints `/batch`.
+    """
+    return [registro.aceita(entrada) for registro, entrada in zip(registros, entradas)]
@@ -1,13 +1,19 @@
-from fastapi import APIRouter, HTTPException
-import uuid
+from fastapi import APIRouter, HTTPException, Request, Response
+import asyncio
 from automata.pda.dpda import DPDA
-from fastapi.responses import FileResponse
 import graphviz
+from ..models.lote import LoteTeste
 from ..models.aut_com_pilha import AutomatoComPilha
-from typing import Dict
+from typing import Dict, MutableMapping, Tuple
+from weakref import WeakValueDictionary
+from cachetools import LRUCache
+from ..simulacao import compilar_ap, internar, internar_tupla
+from ..registro import ENTRADA_INVALIDA, MAX_AUTOMATOS, RegistroAutomato, chave_especificacao, novo_id, testar_lote
+from ..visualizacao import resposta_png
 
 router = APIRouter()
-aut_pilha_db: Dict[str, DPDA] = {}
+aut_pilha_db: MutableMapping[str, RegistroAutomato] = LRUCache(maxsize=MAX_AUTOMATOS)
+aut_pilha_interned: MutableMapping[str, RegistroAutomato] = WeakValueDictionary()
 
 @router.post(
     "/criar", 
@@ -68,32 +74,35 @@ async def criar_aut_pilha(request: AutomatoComPilha):
         HTTPException: Erro 400 se os parâmetros do autômato forem inválidos.
     """
 
-    aut_pilha_id = str(uuid.uuid4())
-    try:
-        formatted_transitions = {
-            state: {
-                input_sym: {
-                    stack_sym: (dest_state, tuple(stack_symbols))
-                    for stack_sym, (dest_state, stack_symbols) in stack_trans.items()
-                }
-                for input_sym, stack_trans in input_trans.items()
-            }
-            for state, input_trans in request.transicoes.items()
-        }
+    aut_pilha_id = novo_id()
+    chave = chave_especificacao(request)
+    registro = aut_pilha_interned.get(chave)
+    if registro is None:
+        try:
+            # Converte as listas empilhadas em tuplas diretamente nos dicionários da requisição
+            for input_trans in request.transicoes.values():
+                for stack_trans in input_trans.values():
+                    for stack_sym, (dest_state, stack_symbols) in stack_trans.items():
+                        stack_trans[stack_sym] = (internar(dest_state), internar_tupla(stack_symbols))
         
-        pda = DPDA(
-            states=set(request.estados),
-            input_symbols=set(request.alfabeto_entrada),
-            stack_symbols=set(request.alfabeto_pilha),
-            initial_state=request.estado_inicial,
-            initial_stack_symbol=request.simbolo_inicial_pilha,
-            final_states=set(request.estados_finais),
-            transitions=formatted_transitions
-        )
-    except Exception as erro:
-        raise HTTPException(status_code=400, detail=str(erro))
+            pda = DPDA(
+                states=set(internar(request.estados)),
+                input_symbols=set(internar(request.alfabeto_entrada)),
+                stack_symbols=set(internar(request.alfabeto_pilha)),
+                initial_state=internar(request.estado_inicial),
+                initial_stack_symbol=internar(request.simbolo_inicial_pilha),
+                final_states=set(internar(request.estados_finais)),
+                transitions=request.transicoes
+            )
+            tabela = compilar_ap(pda)
+        except Exception as erro:
+            raise HTTPException(status_code=400, detail=str(erro))
+
+        registro = RegistroAutomato(pda, simular=tabela.aceita, chave=chave)
+        registro.dot = _construir_grafo(registro).source
+        aut_pilha_interned[chave] = registro
     
-    aut_pilha_db[aut_pilha_id] = pda
+    aut_pilha_db[aut_pilha_id] = registro
     return {"id": aut_pilha_id}
 
 
@@ -126,21 +135,81 @@ async def testar_aut_pilha(aut_pilha_id: str, entrada: str):
     if aut_pilha_id not in aut_pilha_db:
         raise HTTPException(status_code=404, detail="Autômato não encontrado")
     
-    pda = aut_pilha_db[aut_pilha_id]
+    registro = aut_pilha_db[aut_pilha_id]
+    if not registro.entrada_valida(entrada):
+        raise HTTPException(status_code=400, detail=ENTRADA_INVALIDA)
+
     try:
-        aceita = pda.accepts_input(entrada)
+        aceita = await registro.agrupador.executar(entrada)
         return {"aceita": aceita}
     except Exception as erro:
         raise HTTPException(status_code=400, detail=str(erro))
 
 
+@router.post(
+    "/batch",
+    summary="Testar várias entradas em uma única requisição",
+    response_description="Retorna, para cada item, se a entrada é aceita"
+)
+async def testar_lote_aut_pilha(request: LoteTeste):
+    """
+    Testa uma lista de pares (ID, entrada) em uma única requisição, evitando
+    uma chamada HTTP por entrada. Os resultados seguem a ordem dos itens.
+
+    Args:\n
+        request (LoteTeste): Objeto contendo os itens a serem testados:
+            - items (List[ItemTeste]): Lista de itens com `id` e `entrada`.
+
+    Exemplo de entrada:
+
+    ```json
+    {
+        "items": [
+            {"id": "<id>", "entrada": "aabb"},
+            {"id": "<id>", "entrada": "aab"}
+        ]
+    }
+    ```
+
+    Returns:\n
+        Dict[str, List[Dict]]: Dicionário contendo os resultados:
+            - results (List[Dict]): Um item por entrada, com `id`, `entrada` e `aceita` (bool).
+
+    Raises:\n
+        HTTPException: Erro 404 se algum autômato não for encontrado.
+        HTTPException: Erro 400 se alguma entrada for inválida.
+        HTTPException: Erro 422 se o lote tiver mais de 1000 itens (`MAX_ITENS_LOTE`).
+    """
+    registros = []
+    for item in request.items:
+        if item.id not in aut_pilha_db:
+            raise HTTPException(status_code=404, detail=f"Autômato não encontrado: {item.id}")
+        registro = aut_pilha_db[item.id]
+        if not registro.entrada_valida(item.entrada):
+            raise HTTPException(status_code=400, detail=f"{ENTRADA_INVALIDA}: {item.entrada}")
+        registros.append(registro)
+
+    entradas = [item.entrada for item in request.items]
+    try:
+        aceitas = await asyncio.to_thread(testar_lote, registros, entradas)
+    except Exception as erro:
+        raise HTTPException(status_code=400, detail=str(erro))
+
+    return {
+        "results": [
+            {"id": item.id, "entrada": item.entrada, "aceita": aceita}
+            for item, aceita in zip(request.items, aceitas)
+        ]
+    }
+
+
 @router.get(
     "/{aut_pilha_id}/visualizar", 
-    response_class=FileResponse,
+    response_class=Response,
     summary="Gerar visualização do autômato",
     response_description="Retorna uma imagem PNG do autômato"
 )
-async def visualizar_aut_pilha(aut_pilha_id: str):
+async def visualizar_aut_pilha(aut_pilha_id: str, request: Request):
     """
     Gera uma visualização gráfica do autômato com pilha em formato PNG.
 
@@ -148,7 +217,8 @@ async def visualizar_aut_pilha(aut_pilha_id: str):
         aut_pilha_id (str): ID do autômato a ser visualizado.
 
     Returns:\n
-        FileResponse: Arquivo PNG contendo a visualização do autômato.
+        Response: Imagem PNG contendo a visualização do autômato, com cabeçalhos ETag e Cache-Control
+            (304 se a imagem do cliente ainda for válida).
 
     Raises:\n
         HTTPException: Erro 404 se o autômato não for encontrado.
@@ -157,7 +227,15 @@ async def visualizar_aut_pilha(aut_pilha_id: str):
     if aut_pilha_id not in aut_pilha_db:
         raise HTTPException(status_code=404, detail="Autômato não encontrado")
     
-    pda = aut_pilha_db[aut_pilha_id]
+    registro = aut_pilha_db[aut_pilha_id]
+    return await resposta_png(registro, request)
+
+
+def _construir_grafo(registro: RegistroAutomato) -> graphviz.Digraph:
+    """
+    Monta o grafo Graphviz do autômato com pilha.
+    """
+    pda = registro.automato
     dot = graphviz.Digraph()
     dot.attr(rankdir='LR', nodesep="0.5", ranksep="1", size="10", ratio="compress", dpi = "300")
     
@@ -165,21 +243,25 @@ async def visualizar_aut_pilha(aut_pilha_id: str):
     dot.edge('', pda.initial_state)
 
     
-    for estado in pda.states:
-        if estado in pda.final_states:
+    for estado in registro.estados_ordenados:
+        if estado in registro.estados_finais:
             dot.node(estado, shape="doublecircle")
         else:
             dot.node(estado)
     
+    # Rótulo de cada sequência empilhada calculado uma única vez (as tuplas são internadas)
+    label_cache: Dict[Tuple[str, ...], str] = {}
     for from_state, input_dict in pda.transitions.items():
         for input_symbol, stack_dict in input_dict.items():
             for stack_top, (to_state, stack_push) in stack_dict.items():
-                label = f"{input_symbol},{stack_top}/{','.join(stack_push) if stack_push else 'ε'}"
+                label_part = label_cache.get(stack_push)
+                if label_part is None:
+                    label_part = label_cache[stack_push] = ','.join(stack_push) or 'ε'
+                label = f"{input_symbol},{stack_top}/{label_part}"
                 dot.edge(from_state, to_state, label=label)
     
     # Espaço à direita invisível para centralizar a imagem
     dot.node("dummy", "", shape="none", width="0", height="0")
-    dot.edge(list(pda.states)[-1], "dummy", style="invis")  
-    
-    dot.render(f"aut_pilha_{aut_pilha_id}", format="png", cleanup=True)
-    return FileResponse(f"aut_pilha_{aut_pilha_id}.png")    
\ No newline at end of file
+    dot.edge(registro.estados_ordenados[-1], "dummy", style="invis")
+
+    return dot
@@ -1,14 +1,20 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from ..models.aut_fin_det import AutomatoFinitoDeterministico
-import uuid
+import asyncio
 from automata.fa.dfa import DFA
-from fastapi.responses import FileResponse
 import graphviz
-from typing import Dict
+from ..models.lote import LoteTeste
+from typing import MutableMapping
+from weakref import WeakValueDictionary
+from cachetools import LRUCache
+from ..registro import ENTRADA_INVALIDA, MAX_AUTOMATOS, RegistroAutomato, chave_especificacao, novo_id, testar_lote
+from ..visualizacao import resposta_png
+from ..simulacao import compilar_afd, internar
 
 router = APIRouter()
 
-aut_fin_det_db: Dict[str, DFA] = {}
+aut_fin_det_db: MutableMapping[str, RegistroAutomato] = LRUCache(maxsize=MAX_AUTOMATOS)
+aut_fin_det_interned: MutableMapping[str, RegistroAutomato] = WeakValueDictionary()
 
 @router.post(
     "/criar",
@@ -50,19 +56,27 @@ async def criar_aut_fin_det(request: AutomatoFinitoDeterministico):
     Raises:\n
         HTTPException: Erro 400 se os parâmetros do autômato forem inválidos.
     """
-    aut_fin_det_id = str(uuid.uuid4())
-    try:
-        dfa = DFA(
-            states=set(request.estados),
-            input_symbols=set(request.alfabeto_entrada),
-            initial_state=request.estado_inicial,
-            final_states=set(request.estados_finais),
-            transitions=request.transicoes
-        )
-    except Exception as erro:
-        raise HTTPException(status_code=400, detail=str(erro))
+    aut_fin_det_id = novo_id()
+    chave = chave_especificacao(request)
+    registro = aut_fin_det_interned.get(chave)
+    if registro is None:
+        try:
+            dfa = DFA(
+                states=set(internar(request.estados)),
+                input_symbols=set(internar(request.alfabeto_entrada)),
+                initial_state=internar(request.estado_inicial),
+                final_states=set(internar(request.estados_finais)),
+                transitions=internar(request.transicoes)
+            )
+            tabela = compilar_afd(dfa)
+        except Exception as erro:
+            raise HTTPException(status_code=400, detail=str(erro))
+
+        registro = RegistroAutomato(dfa, simular=tabela.aceita, chave=chave)
+        registro.dot = _construir_grafo(registro).source
+        aut_fin_det_interned[chave] = registro
     
-    aut_fin_det_db[aut_fin_det_id] = dfa
+    aut_fin_det_db[aut_fin_det_id] = registro
     return {"id": aut_fin_det_id}
 
 
@@ -94,21 +108,81 @@ async def testar_aut_fin_det(aut_fin_det_id: str, entrada: str):
     if aut_fin_det_id not in aut_fin_det_db:
         raise HTTPException(status_code=404, detail="Autômato não encontrado")
     
-    dfa = aut_fin_det_db[aut_fin_det_id]
+    registro = aut_fin_det_db[aut_fin_det_id]
+    if not registro.entrada_valida(entrada):
+        raise HTTPException(status_code=400, detail=ENTRADA_INVALIDA)
+
     try:
-        aceita = dfa.accepts_input(entrada)
+        aceita = await registro.agrupador.executar(entrada)
         return {"aceita": aceita}
     except Exception as erro:
         raise HTTPException(status_code=400, detail=str(erro))
 
 
+@router.post(
+    "/batch",
+    summary="Testar várias entradas em uma única requisição",
+    response_description="Retorna, para cada item, se a entrada é aceita"
+)
+async def testar_lote_aut_fin_det(request: LoteTeste):
+    """
+    Testa uma lista de pares (ID, entrada) em uma única requisição, evitando
+    uma chamada HTTP por entrada. Os resultados seguem a ordem dos itens.
+
+    Args:\n
+        request (LoteTeste): Objeto contendo os itens a serem testados:
+            - items (List[ItemTeste]): Lista de itens com `id` e `entrada`.
+
+    Exemplo de entrada:
+
+    ```json
+    {
+        "items": [
+            {"id": "<id>", "entrada": "aab"},
+            {"id": "<id>", "entrada": "ba"}
+        ]
+    }
+    ```
+
+    Returns:\n
+        Dict[str, List[Dict]]: Dicionário contendo os resultados:
+            - results (List[Dict]): Um item por entrada, com `id`, `entrada` e `aceita` (bool).
+
+    Raises:\n
+        HTTPException: Erro 404 se algum autômato não for encontrado.
+        HTTPException: Erro 400 se alguma entrada for inválida.
+        HTTPException: Erro 422 se o lote tiver mais de 1000 itens (`MAX_ITENS_LOTE`).
+    """
+    registros = []
+    for item in request.items:
+        if item.id not in aut_fin_det_db:
+            raise HTTPException(status_code=404, detail=f"Autômato não encontrado: {item.id}")
+        registro = aut_fin_det_db[item.id]
+        if not registro.entrada_valida(item.entrada):
+            raise HTTPException(status_code=400, detail=f"{ENTRADA_INVALIDA}: {item.entrada}")
+        registros.append(registro)
+
+    entradas = [item.entrada for item in request.items]
+    try:
+        aceitas = await asyncio.to_thread(testar_lote, registros, entradas)
+    except Exception as erro:
+        raise HTTPException(status_code=400, detail=str(erro))
+
+    return {
+        "results": [
+            {"id": item.id, "entrada": item.entrada, "aceita": aceita}
+            for item, aceita in zip(request.items, aceitas)
+        ]
+    }
+
+
 @router.get(
     "/{aut_fin_det_id}/visualizar",
-    response_class=FileResponse,
+    response_class=Response,
     summary="Gerar visualização do autômato",
     response_description="Retorna uma imagem PNG do autômato"
 )
-async def visualizar_aut_fin_det(aut_fin_det_id: str):
+async def visualizar_aut_fin_det(aut_fin_det_id: str, request: Request):
     """
     Gera uma visualização gráfica do autômato finito determinístico (AFD) em formato PNG.
 
@@ -116,7 +190,8 @@ async def visualizar_aut_fin_det(aut_fin_det_id: str):
         aut_fin_det_id (str): ID do autômato a ser visualizado.
 
     Returns:\n
-        FileResponse: Arquivo PNG contendo a visualização do autômato.
+        Response: Imagem PNG contendo a visualização do autômato, com cabeçalhos ETag e Cache-Control
+            (304 se a imagem do cliente ainda for válida).
 
     Raises:\n
         HTTPException: Erro 404 se o autômato não for encontrado.
@@ -125,16 +200,23 @@ async def visualizar_aut_fin_det(aut_fin_det_id: str):
     if aut_fin_det_id not in aut_fin_det_db:
         raise HTTPException(status_code=404, detail="Autômato não encontrado")
     
-    dfa = aut_fin_det_db[aut_fin_det_id]
-    
+    registro = aut_fin_det_db[aut_fin_det_id]
+    return await resposta_png(registro, request)
+
+
+def _construir_grafo(registro: RegistroAutomato) -> graphviz.Digraph:
+    """
+    Monta o grafo Graphviz do autômato finito determinístico (AFD).
+    """
+    dfa = registro.automato
     dot = graphviz.Digraph()
     dot.attr(rankdir='LR', nodesep="0.5", ranksep="1", size="10", ratio="compress", dpi = "300")
 
     dot.node('', '', shape='none')
     dot.edge('', dfa.initial_state)
 
-    for estado in dfa.states:
-        if estado in dfa.final_states:
+    for estado in registro.estados_ordenados:
+        if estado in registro.estados_finais:
             dot.node(estado, shape="doublecircle")
         else:
             dot.node(estado, shape="circle")
@@ -145,8 +227,6 @@ async def visualizar_aut_fin_det(aut_fin_det_id: str):
 
     # Espaço à direita invisível para centralizar a imagem
     dot.node("dummy", "", shape="none", width="0", height="0")
-    dot.edge(list(dfa.states)[-1], "dummy", style="invis")  
+    dot.edge(registro.estados_ordenados[-1], "dummy", style="invis")  
 
-    dot.render(f"aut_fin_det_{aut_fin_det_id}", format="png", cleanup=True)
-    
-    return FileResponse(f"aut_fin_det_{aut_fin_det_id}.png")
+    return dot
@@ -1,13 +1,19 @@
-from fastapi import APIRouter, HTTPException
-import uuid
+from fastapi import APIRouter, HTTPException, Request, Response
+import asyncio
 from automata.tm.dtm import DTM
-from fastapi.responses import FileResponse
 import graphviz
+from ..models.lote import LoteTeste
 from ..models.maq_turing import MaquinaTuring
-from typing import Dict
+from typing import MutableMapping
+from weakref import WeakValueDictionary
+from cachetools import LRUCache
+from ..simulacao import internar
+from ..registro import ENTRADA_INVALIDA, MAX_AUTOMATOS, RegistroAutomato, chave_especificacao, novo_id, testar_lote
+from ..visualizacao import resposta_png
 
 router = APIRouter()
-maquinas_turing_db: Dict[str, DTM] = {}
+maquinas_turing_db: MutableMapping[str, RegistroAutomato] = LRUCache(maxsize=MAX_AUTOMATOS)
+maquinas_turing_interned: MutableMapping[str, RegistroAutomato] = WeakValueDictionary()
 
 @router.post(
     "/criar", 
@@ -59,21 +65,28 @@ async def criar_maquina_turing(request: MaquinaTuring):
     Raises:\n
         HTTPException: Erro 400 se os parâmetros do autômato forem inválidos.
     """
-    maquina_turing_id = str(uuid.uuid4())
-    try:
-        dtm = DTM(
-            states=set(request.estados),
-            input_symbols=set(request.alfabeto_entrada),
-            tape_symbols=set(request.alfabeto_fita),
-            transitions=request.transicoes,
-            initial_state=request.estado_inicial,
-            blank_symbol=request.branco,
-            final_states=set(request.estados_finais)
-        )
-    except Exception as erro:
-        raise HTTPException(status_code=400, detail=str(erro))
+    maquina_turing_id = novo_id()
+    chave = chave_especificacao(request)
+    registro = maquinas_turing_interned.get(chave)
+    if registro is None:
+        try:
+            dtm = DTM(
+                states=set(internar(request.estados)),
+                input_symbols=set(internar(request.alfabeto_entrada)),
+                tape_symbols=set(internar(request.alfabeto_fita)),
+                transitions=internar(request.transicoes),
+                initial_state=internar(request.estado_inicial),
+                blank_symbol=internar(request.branco),
+                final_states=set(internar(request.estados_finais))
+            )
+        except Exception as erro:
+            raise HTTPException(status_code=400, detail=str(erro))
+
+        registro = RegistroAutomato(dtm, chave=chave)
+        registro.dot = _construir_grafo(registro).source
+        maquinas_turing_interned[chave] = registro
     
-    maquinas_turing_db[maquina_turing_id] = dtm
+    maquinas_turing_db[maquina_turing_id] = registro
     return {"id": maquina_turing_id}
 
 
@@ -105,21 +118,81 @@ async def testar_maquina_turing(maquina_turing_id: str, entrada: str):
     if maquina_turing_id not in maquinas_turing_db:
         raise HTTPException(status_code=404, detail="Máquina de Turing não encontrada")
     
-    dtm = maquinas_turing_db[maquina_turing_id]
+    registro = maquinas_turing_db[maquina_turing_id]
+    if not registro.entrada_valida(entrada):
+        raise HTTPException(status_code=400, detail=ENTRADA_INVALIDA)
+
     try:
-        aceita = dtm.accepts_input(entrada)
+        aceita = await registro.agrupador.executar(entrada)
         return {"aceita": aceita}
     except Exception as erro:
         raise HTTPException(status_code=400, detail=str(erro))
 
 
+@router.post(
+    "/batch",
+    summary="Testar várias entradas em uma única requisição",
+    response_description="Retorna, para cada item, se a entrada é aceita"
+)
+async def testar_lote_maquina_turing(request: LoteTeste):
+    """
+    Testa uma lista de pares (ID, entrada) em uma única requisição, evitando
+    uma chamada HTTP por entrada. Os resultados seguem a ordem dos itens.
+
+    Args:\n
+        request (LoteTeste): Objeto contendo os itens a serem testados:
+            - items (List[ItemTeste]): Lista de itens com `id` e `entrada`.
+
+    Exemplo de entrada:
+
+    ```json
+    {
+        "items": [
+            {"id": "<id>", "entrada": "abaaba"},
+            {"id": "<id>", "entrada": "ab"}
+        ]
+    }
+    ```
+
+    Returns:\n
+        Dict[str, List[Dict]]: Dicionário contendo os resultados:
+            - results (List[Dict]): Um item por entrada, com `id`, `entrada` e `aceita` (bool).
+
+    Raises:\n
+        HTTPException: Erro 404 se alguma MT não for encontrada.
+        HTTPException: Erro 400 se alguma entrada for inválida.
+        HTTPException: Erro 422 se o lote tiver mais de 1000 itens (`MAX_ITENS_LOTE`).
+    """
+    registros = []
+    for item in request.items:
+        if item.id not in maquinas_turing_db:
+            raise HTTPException(status_code=404, detail=f"Máquina de Turing não encontrada: {item.id}")
+        registro = maquinas_turing_db[item.id]
+        if not registro.entrada_valida(item.entrada):
+            raise HTTPException(status_code=400, detail=f"{ENTRADA_INVALIDA}: {item.entrada}")
+        registros.append(registro)
+
+    entradas = [item.entrada for item in request.items]
+    try:
+        aceitas = await asyncio.to_thread(testar_lote, registros, entradas)
+    except Exception as erro:
+        raise HTTPException(status_code=400, detail=str(erro))
+
+    return {
+        "results": [
+            {"id": item.id, "entrada": item.entrada, "aceita": aceita}
+            for item, aceita in zip(request.items, aceitas)
+        ]
+    }
+
+
 @router.get(
     "/{maquina_turing_id}/visualizar", 
-    response_class=FileResponse, 
+    response_class=Response, 
     summary="Gerar visualização da Máquina de Turing", 
     response_description="Retorna uma imagem PNG da Máquina de Turing"
 )
-async def visualizar_maquina_turing(maquina_turing_id: str):
+async def visualizar_maquina_turing(maquina_turing_id: str, request: Request):
     """
     Gera uma visualização gráfica da Máquina de Turing em formato PNG.
 
@@ -127,7 +200,8 @@ async def visualizar_maquina_turing(maquina_turing_id: str):
         maquina_turing_id (str): ID do MT a ser visualizada.
 
     Returns:\n
-        FileResponse: Arquivo PNG contendo a visualização da MT.
+        Response: Imagem PNG contendo a visualização da MT, com cabeçalhos ETag e Cache-Control
+            (304 se a imagem do cliente ainda for válida).
 
     Raises:\n
         HTTPException: Erro 404 se a Máquina de Turing não for encontrada.
@@ -137,15 +211,23 @@ async def visualizar_maquina_turing(maquina_turing_id: str):
     if maquina_turing_id not in maquinas_turing_db:
         raise HTTPException(status_code=404, detail="Máquina de Turing não encontrada")
     
-    dtm = maquinas_turing_db[maquina_turing_id]
+    registro = maquinas_turing_db[maquina_turing_id]
+    return await resposta_png(registro, request)
+
+
+def _construir_grafo(registro: RegistroAutomato) -> graphviz.Digraph:
+    """
+    Monta o grafo Graphviz da Máquina de Turing.
+    """
+    dtm = registro.automato
     dot = graphviz.Digraph()
     dot.attr(rankdir='LR', nodesep="0.5", ranksep="1", size="10", ratio="compress", dpi = "300")
 
     dot.node('', '', shape='none')
     dot.edge('', dtm.initial_state)
     
-    for estado in dtm.states:
-        if estado in dtm.final_states:
+    for estado in registro.estados_ordenados:
+        if estado in registro.estados_finais:
             dot.node(estado, shape="doublecircle")
         else:
             dot.node(estado)
@@ -157,7 +239,6 @@ async def visualizar_maquina_turing(maquina_turing_id: str):
             
     # Espaço à direita invisível para centralizar a imagem
     dot.node("dummy", "", shape="none", width="0", height="0")
-    dot.edge(list(dtm.states)[-1], "dummy", style="invis")  
+    dot.edge(registro.estados_ordenados[-1], "dummy", style="invis")
 
-    dot.render(f"maquina_turing_{maquina_turing_id}", format="png", cleanup=True)
-    return FileResponse(f"maquina_turing_{maquina_turing_id}.png")
+    return dot
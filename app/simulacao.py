@@ -0,0 +1,206 @@
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from automata.fa.dfa import DFA
+from automata.pda.dpda import DPDA
+
+
+def internar(valor: Any) -> Any:
+    """
+    Aplica `sys.intern` às strings de `valor`, percorrendo listas, tuplas e
+    dicionários (chaves e valores). Estados e símbolos repetidos nas transições
+    passam a ser o mesmo objeto, o que torna as buscas nos dicionários do
+    simulador comparações por identidade.
+    """
+    if isinstance(valor, str):
+        return sys.intern(valor)
+    if isinstance(valor, dict):
+        return {internar(chave): internar(item) for chave, item in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return type(valor)(internar(item) for item in valor)
+    return valor
+
+
+# Tuplas curtas de símbolos (como as sequências empilhadas por um AP) compartilhadas entre autômatos
+TAMANHO_MAX_TUPLA_INTERNADA = 2
+MAX_TUPLAS_INTERNADAS = 4096
+_tuplas_internadas: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def internar_tupla(simbolos: Sequence[str]) -> Tuple[str, ...]:
+    """
+    Converte `simbolos` em uma tupla de strings internadas. Tuplas com até
+    `TAMANHO_MAX_TUPLA_INTERNADA` símbolos são compartilhadas (hash-consing),
+    de modo que transições que empilham a mesma sequência, em qualquer
+    autômato, reutilizam o mesmo objeto.
+    """
+    tupla = tuple(sys.intern(simbolo) for simbolo in simbolos)
+    if len(tupla) > TAMANHO_MAX_TUPLA_INTERNADA:
+        return tupla
+
+    compartilhada = _tuplas_internadas.get(tupla)
+    if compartilhada is None:
+        if len(_tuplas_internadas) >= MAX_TUPLAS_INTERNADAS:
+            return tupla
+        compartilhada = _tuplas_internadas[tupla] = tupla
+    return compartilhada
+
+
+@dataclass(frozen=True)
+class TabelaAFD:
+    """
+    Tabela de transições de um AFD compactada em uma lista de inteiros.
+
+    Os estados e símbolos são numerados na criação do autômato e a transição
+    (estado, símbolo) fica na posição `estado * n_simbolos + coluna`, de modo
+    que a simulação percorre a entrada apenas com indexação de listas.
+    """
+    estados_idx: Dict[str, int]
+    alfabeto_idx: Dict[str, int]
+    tabela: List[int]
+    finais: List[bool]
+    inicial: int
+
+    def aceita(self, entrada: str) -> bool:
+        tabela = self.tabela
+        colunas = self.alfabeto_idx
+        n_simbolos = len(colunas)
+        estado = self.inicial
+        for simbolo in entrada:
+            coluna = colunas.get(simbolo)
+            if coluna is None:
+                return False
+            estado = tabela[estado * n_simbolos + coluna]
+            if estado < 0:
+                return False
+        return self.finais[estado]
+
+
+def compilar_afd(dfa: DFA) -> TabelaAFD:
+    """
+    Gera a `TabelaAFD` equivalente ao AFD informado. Transições ausentes
+    (AFD parcial) são marcadas com -1 e rejeitam a entrada.
+    """
+    estados_idx = {estado: i for i, estado in enumerate(sorted(dfa.states))}
+    alfabeto_idx = {simbolo: i for i, simbolo in enumerate(sorted(dfa.input_symbols))}
+    n_simbolos = len(alfabeto_idx)
+
+    tabela = [-1] * (len(estados_idx) * n_simbolos)
+    for origem, transicoes in dfa.transitions.items():
+        base = estados_idx[origem] * n_simbolos
+        for simbolo, destino in transicoes.items():
+            tabela[base + alfabeto_idx[simbolo]] = estados_idx[destino]
+
+    finais = [estado in dfa.final_states for estado in estados_idx]
+    return TabelaAFD(estados_idx, alfabeto_idx, tabela, finais, estados_idx[dfa.initial_state])
+
+
+# Transição compilada de um AP: (próximo estado, símbolos a empilhar na ordem de `list.extend`)
+TransicaoAP = Tuple[int, Tuple[int, ...]]
+
+
+@dataclass(frozen=True)
+class TabelaAP:
+    """
+    Tabelas de transição de um autômato com pilha determinístico (DPDA) com
+    estados, símbolos de entrada e símbolos de pilha numerados.
+
+    A transição (estado, símbolo, topo) fica na posição
+    `(estado * n_simbolos + coluna) * n_pilha + topo` de `transicoes`, e a
+    transição vazia (estado, topo) em `estado * n_pilha + topo` de
+    `transicoes_lambda`. A pilha é uma lista de inteiros com o topo no final.
+    A simulação segue a mesma semântica de `DPDA.accepts_input`.
+    """
+    alfabeto_idx: Dict[str, int]
+    n_pilha: int
+    transicoes: List[Optional[TransicaoAP]]
+    transicoes_lambda: List[Optional[TransicaoAP]]
+    finais: List[bool]
+    inicial: int
+    pilha_inicial: int
+    topo_vazio: int
+    aceita_estado_final: bool
+    aceita_pilha_vazia: bool
+
+    def _aceitou(self, estado: int, pilha: List[int]) -> bool:
+        return (self.aceita_pilha_vazia and not pilha) or (self.aceita_estado_final and self.finais[estado])
+
+    def aceita(self, entrada: str) -> bool:
+        transicoes = self.transicoes
+        transicoes_lambda = self.transicoes_lambda
+        colunas = self.alfabeto_idx
+        n_simbolos = len(colunas)
+        n_pilha = self.n_pilha
+        n = len(entrada)
+
+        estado = self.inicial
+        pilha = [self.pilha_inicial]
+        i = 0
+        while True:
+            topo = pilha[-1] if pilha else self.topo_vazio
+            transicao = None
+            if topo >= 0:
+                if i < n:
+                    coluna = colunas.get(entrada[i])
+                    if coluna is not None:
+                        transicao = transicoes[(estado * n_simbolos + coluna) * n_pilha + topo]
+                        if transicao is not None:
+                            i += 1
+                if transicao is None:
+                    transicao = transicoes_lambda[estado * n_pilha + topo]
+
+            if transicao is None:
+                return i == n and self._aceitou(estado, pilha)
+
+            estado, empilhar = transicao
+            if pilha:
+                pilha.pop()
+            pilha.extend(empilhar)
+            if i == n and self._aceitou(estado, pilha):
+                return True
+
+
+def compilar_ap(pda: DPDA) -> TabelaAP:
+    """
+    Gera a `TabelaAP` equivalente ao DPDA informado.
+    """
+    estados_idx = {estado: i for i, estado in enumerate(sorted(pda.states))}
+    alfabeto_idx = {simbolo: i for i, simbolo in enumerate(sorted(pda.input_symbols))}
+
+    # Símbolos empilhados fora de `stack_symbols` também recebem um código
+    simbolos_pilha = set(pda.stack_symbols) | {pda.initial_stack_symbol}
+    for transicoes_entrada in pda.transitions.values():
+        for transicoes_pilha in transicoes_entrada.values():
+            simbolos_pilha.update(transicoes_pilha)
+            for _, empilhar in transicoes_pilha.values():
+                simbolos_pilha.update(empilhar)
+    pilha_idx = {simbolo: i for i, simbolo in enumerate(sorted(simbolos_pilha))}
+
+    n_simbolos = len(alfabeto_idx)
+    n_pilha = len(pilha_idx)
+    transicoes: List[Optional[TransicaoAP]] = [None] * (len(estados_idx) * n_simbolos * n_pilha)
+    transicoes_lambda: List[Optional[TransicaoAP]] = [None] * (len(estados_idx) * n_pilha)
+
+    for origem, transicoes_entrada in pda.transitions.items():
+        o = estados_idx[origem]
+        for simbolo, transicoes_pilha in transicoes_entrada.items():
+            for topo, (destino, empilhar) in transicoes_pilha.items():
+                transicao = (estados_idx[destino], tuple(pilha_idx[s] for s in reversed(empilhar)))
+                if simbolo == "":
+                    transicoes_lambda[o * n_pilha + pilha_idx[topo]] = transicao
+                elif simbolo in alfabeto_idx:
+                    transicoes[(o * n_simbolos + alfabeto_idx[simbolo]) * n_pilha + pilha_idx[topo]] = transicao
+
+    return TabelaAP(
+        alfabeto_idx=alfabeto_idx,
+        n_pilha=n_pilha,
+        transicoes=transicoes,
+        transicoes_lambda=transicoes_lambda,
+        finais=[estado in pda.final_states for estado in estados_idx],
+        inicial=estados_idx[pda.initial_state],
+        pilha_inicial=pilha_idx[pda.initial_stack_symbol],
+        topo_vazio=pilha_idx.get("", -1),
+        aceita_estado_final=pda.acceptance_mode in ("final_state", "both"),
+        aceita_pilha_vazia=pda.acceptance_mode in ("empty_stack", "both"),
+    )
@@ -0,0 +1,71 @@
+import asyncio
+from typing import MutableMapping
+from weakref import WeakValueDictionary
+
+import graphviz
+from cachetools import LRUCache
+from fastapi import Request, Response
+
+from .registro import RegistroAutomato
+
+# Total máximo de bytes de imagens PNG mantidas em memória
+MAX_BYTES_PNGS = 64 * 1024 * 1024
+
+# Tempo (s) que clientes podem reutilizar uma imagem sem revalidá-la
+MAX_AGE_PNG = 3600
+
+# PNGs já renderizados, por chave da especificação (compartilhados entre IDs equivalentes),
+# limitados pelo tamanho total em bytes
+_png_cache: MutableMapping[str, bytes] = LRUCache(maxsize=MAX_BYTES_PNGS, getsizeof=len)
+
+# Um lock por imagem em renderização, para que requisições simultâneas aguardem o mesmo processo `dot`
+_render_locks: MutableMapping[str, asyncio.Lock] = WeakValueDictionary()
+
+
+async def renderizar_png(registro: RegistroAutomato) -> bytes:
+    """
+    Retorna a imagem PNG do autômato, renderizando o código DOT gerado na
+    criação (`registro.dot`) apenas se ela não estiver em cache. Imagens
+    maiores que `MAX_BYTES_PNGS` são retornadas sem entrar no cache. O Graphviz
+    roda em uma thread separada (`asyncio.to_thread`) para não bloquear o
+    event loop, e a saída é lida diretamente da memória (`graphviz.pipe`).
+
+    Args:\n
+        registro (RegistroAutomato): Registro do autômato a ser visualizado.
+
+    Returns:\n
+        bytes: Conteúdo da imagem PNG.
+    """
+    png = _png_cache.get(registro.chave)
+    if png is None:
+        lock = _render_locks.get(registro.chave)
+        if lock is None:
+            lock = _render_locks[registro.chave] = asyncio.Lock()
+        async with lock:
+            png = _png_cache.get(registro.chave)
+            if png is None:
+                png = await asyncio.to_thread(graphviz.pipe, "dot", "png", registro.dot.encode())
+                if len(png) <= MAX_BYTES_PNGS:
+                    _png_cache[registro.chave] = png
+    return png
+
+
+def _etag_corresponde(etag: str, if_none_match: str) -> bool:
+    etags = [valor.strip().removeprefix("W/") for valor in if_none_match.split(",")]
+    return "*" in etags or etag in etags
+
+
+async def resposta_png(registro: RegistroAutomato, request: Request) -> Response:
+    """
+    Monta a resposta HTTP com a imagem do autômato. A ETag é a chave da
+    especificação, que identifica o conteúdo da imagem; se o cliente já a
+    possui (`If-None-Match`), retorna 304 sem renderizar.
+    """
+    etag = f'"{registro.chave}"'
+    headers = {"Cache-Control": f"public, max-age={MAX_AGE_PNG}", "ETag": etag}
+
+    if _etag_corresponde(etag, request.headers.get("if-none-match", "")):
+        return Response(status_code=304, headers=headers)
+
+    png = await renderizar_png(registro)
+    return Response(content=png, media_type="image/png", headers=headers)